@@ -3,15 +3,37 @@ AI Chat Offline - A local chatbot using Hugging Face's DialoGPT model.
 
 This module provides an interactive chatbot that runs locally without requiring
 internet connectivity after the initial model download.
+
+torch and transformers are imported where they are first needed, so importing
+this module (e.g. from web_bot.py) stays fast until the model is loaded.
 """
 
+from __future__ import annotations
+
+import contextlib
+import importlib.util
 import logging
+import os
+import queue
 import sys
-from typing import Optional, Tuple
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer, GenerationConfig
+import time
+from functools import cached_property
+from logging.handlers import QueueHandler, QueueListener
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 
-# Configure logging
+if TYPE_CHECKING:
+    import torch
+    from transformers import (
+        AutoModelForCausalLM,
+        AutoTokenizer,
+        BitsAndBytesConfig,
+        GenerationConfig,
+        StaticCache,
+    )
+    from transformers.generation.streamers import BaseStreamer
+
+# Configure logging. Handlers write synchronously until start_logging() moves
+# them onto a background thread
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -23,16 +45,147 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class _RightPaddingFilter(logging.Filter):
+    """
+    Drop transformers' right-padding warning for batched generate() calls.
+    
+    Rows are left-padded with the EOS id, which doubles as the pad id, and every
+    row ends in EOS, so the check fires on each call although nothing is wrong.
+    """
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        return "right-padding was detected" not in record.getMessage()
+
+
+logging.getLogger("transformers.generation.utils").addFilter(_RightPaddingFilter())
+
+# Terminal chat loop input handling
+_EXIT_WORDS = frozenset({"quit", "exit", "bye", "q"})
+_USER_PROMPT = "👤 You: "
+
+# Warm-up input: a typical first message, decoded for enough steps that the
+# compiled decode step is recorded as a CUDA graph and then replayed
+_WARM_UP_PROMPT = "Hello! How are you doing today?"
+_WARM_UP_TOKENS = 8
+
+
+def start_logging() -> QueueListener:
+    """
+    Move the root logger's handlers onto a background thread.
+    
+    Logging calls then only enqueue records; the returned listener writes them
+    to the original handlers. Pass it to stop_logging() on exit.
+    """
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    log_queue: queue.Queue = queue.Queue(-1)
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def stop_logging(listener: QueueListener) -> None:
+    """Flush queued records and give the handlers back to the root logger."""
+    listener.stop()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    for handler in listener.handlers:
+        root.addHandler(handler)
+
+
 class ChatbotConfig:
     """Configuration class for chatbot parameters."""
     
     def __init__(self):
         self.model_name = "microsoft/DialoGPT-medium"
-        self.max_length = 1000
+        self.max_length = 1000  # total tokens held in the KV cache
+        self.max_new_tokens = 128  # reply length cap per turn
         self.temperature = 0.7
         self.top_p = 0.9
         self.max_conversation_steps = 10
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.quantization = "int8"  # "int8", "int4" or None; CUDA only
+        self.compile_model = True  # torch.compile the decode step; CUDA, unquantized only
+        self.cpu_bf16 = True  # bfloat16 weights on CPUs with native bf16 support
+        self.backend = "torch"  # "torch" or "onnx" (ONNX Runtime, needs optimum)
+        self.onnx_dir = "onnx"  # where exported ONNX models are stored
+        self.max_batch_size = 1  # rows per batched generate(); web_bot raises it
+    
+    @cached_property
+    def device(self) -> str:
+        """Device to run on, probed on first use so CPU-only callers skip CUDA init."""
+        # AI_CHAT_DEVICE ("cuda" or "cpu") skips the probe entirely
+        override = os.environ.get("AI_CHAT_DEVICE")
+        if override:
+            return override
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _left_pad(
+    rows: List[List[int]],
+    batch_size: int,
+    pad_id: int
+) -> Tuple[List[List[int]], List[List[int]]]:
+    """
+    Left-pad token rows to a common width and fill the batch up to batch_size.
+    
+    Filler rows attend to a single pad token so they never produce an all-masked
+    attention row. Returns (input ids, attention mask) as nested lists.
+    """
+    width = max(len(ids) for ids in rows)
+    rows = rows + [[pad_id]] * (batch_size - len(rows))
+    input_ids = [[pad_id] * (width - len(ids)) + ids for ids in rows]
+    attention_mask = [[0] * (width - len(ids)) + [1] * len(ids) for ids in rows]
+    return input_ids, attention_mask
+
+
+class BatchStreamer:
+    """
+    Streamer reporting each row's decoded reply so far during batched generation.
+    
+    Implements the put()/end() interface of transformers' BaseStreamer.
+    """
+    
+    def __init__(
+        self,
+        tokenizer: AutoTokenizer,
+        on_text: Callable[[int, str], None],
+        num_rows: int
+    ):
+        self.tokenizer = tokenizer
+        self.on_text = on_text
+        self.num_rows = num_rows  # rows past this are batch padding and not reported
+        self.prompt_seen = False
+        self.row_tokens: List[List[int]] = []
+        self.row_texts: List[str] = []
+    
+    def put(self, value: torch.Tensor) -> None:
+        """Receive the next token of every row; the first call carries the prompt."""
+        if not self.prompt_seen:
+            self.prompt_seen = True
+            return
+        
+        tokens = value.reshape(-1).tolist()[:self.num_rows]
+        if not self.row_tokens:
+            self.row_tokens = [[] for _ in tokens]
+            self.row_texts = ["" for _ in tokens]
+        
+        for row, token in enumerate(tokens):
+            self.row_tokens[row].append(token)
+            # Decoding the whole reply keeps multi-byte characters intact
+            text = self.tokenizer.decode(self.row_tokens[row], skip_special_tokens=True)
+            if text != self.row_texts[row]:
+                self.row_texts[row] = text
+                self.on_text(row, text)
+    
+    def end(self) -> None:
+        """Nothing to flush; every put() already reports the full text."""
 
 
 class Chatbot:
@@ -42,12 +195,28 @@ class Chatbot:
         self.config = config
         self.tokenizer: Optional[AutoTokenizer] = None
         self.model: Optional[AutoModelForCausalLM] = None
+        self.eos_id: Optional[int] = None
+        self.eos_tensor: Optional[torch.Tensor] = None
         self.chat_history_ids: Optional[torch.Tensor] = None
+        self.gen_config: Optional[GenerationConfig] = None
+        self.kv_cache: Optional[StaticCache] = None
+        self.batch_cache: Optional[StaticCache] = None
+        self.cpu_autocast = False
+        self.cache_length = 0
         self.step_count = 0
         
     def load_model(self) -> bool:
         """Load the tokenizer and model with error handling."""
         try:
+            import torch
+            from transformers import (
+                AutoModelForCausalLM,
+                AutoTokenizer,
+                CompileConfig,
+                GenerationConfig,
+                StaticCache,
+            )
+            
             logger.info(f"Loading model: {self.config.model_name}")
             logger.info(f"Using device: {self.config.device}")
             
@@ -58,14 +227,107 @@ class Chatbot:
             if self.tokenizer.pad_token is None:
                 self.tokenizer.pad_token = self.tokenizer.eos_token
             
+            # Cache the EOS id and tensor appended to every user turn
+            self.eos_id = self.tokenizer.eos_token_id
+            self.eos_tensor = torch.tensor([[self.eos_id]], device=self.config.device)
+            
+            # Sampling settings are validated once here rather than on every turn
+            self.gen_config = GenerationConfig(
+                max_new_tokens=self.config.max_new_tokens,
+                do_sample=True,
+                temperature=self.config.temperature,
+                top_p=self.config.top_p,
+                pad_token_id=self.eos_id,
+                eos_token_id=self.eos_id,
+                num_return_sequences=1,
+                use_cache=True,
+                return_dict_in_generate=True
+            )
+            
+            # ONNX Runtime manages its own KV cache, so the torch-only setup is skipped
+            if self.config.backend == "onnx":
+                if not self._load_onnx_model():
+                    return False
+                self._warm_up()
+                logger.info("Model loaded successfully!")
+                return True
+            
             # Load model
-            self.model = AutoModelForCausalLM.from_pretrained(
-                self.config.model_name,
-                torch_dtype=torch.float16 if self.config.device == "cuda" else torch.float32
+            quantization_config = self._build_quantization_config()
+            if quantization_config is not None:
+                logger.info(f"Quantizing model weights to {self.config.quantization}")
+                self.model = AutoModelForCausalLM.from_pretrained(
+                    self.config.model_name,
+                    torch_dtype=torch.float16,
+                    attn_implementation="sdpa",
+                    quantization_config=quantization_config,
+                    device_map="auto"
+                )
+            else:
+                if self.config.device == "cuda":
+                    torch_dtype = torch.float16
+                elif self.config.cpu_bf16 and self._cpu_supports_bf16():
+                    logger.info("Using bfloat16 weights on CPU")
+                    torch_dtype = torch.bfloat16
+                    self.cpu_autocast = True
+                else:
+                    torch_dtype = torch.float32
+                
+                self.model = AutoModelForCausalLM.from_pretrained(
+                    self.config.model_name,
+                    torch_dtype=torch_dtype,
+                    attn_implementation="sdpa"
+                )
+                
+                # Move model to device
+                self.model.to(self.config.device)
+            
+            # CPU latency scales with the number of intra-op threads, but only up
+            # to the cores this process may run on; torch's default can exceed the
+            # affinity mask, so it is capped there and never raised
+            if self.config.device == "cpu" and hasattr(os, "sched_getaffinity"):
+                usable_cores = len(os.sched_getaffinity(0))
+                torch.set_num_threads(min(torch.get_num_threads(), usable_cores))
+            
+            # With a StaticCache on CUDA, generate() compiles only the decode step,
+            # whose shapes stay fixed; prefill runs eagerly. bitsandbytes-quantized
+            # weights are not compileable, so they always run eagerly
+            compile_decode = (
+                self.config.compile_model
+                and self.config.device == "cuda"
+                and quantization_config is None
             )
+            self.gen_config.disable_compile = not compile_decode
+            if compile_decode:
+                logger.info("Compiling the decode step on first use")
+                self.gen_config.compile_config = CompileConfig(
+                    mode="reduce-overhead",
+                    fullgraph=True,
+                    dynamic=False
+                )
+            
+            if self.config.max_batch_size == 1:
+                # Pre-allocate the KV cache once; turns write into it in place
+                self.kv_cache = StaticCache(
+                    config=self.model.config,
+                    max_batch_size=1,
+                    max_cache_len=self.config.max_length,
+                    device=self.config.device,
+                    dtype=self.model.dtype
+                )
+            elif compile_decode:
+                # A compiled decode step needs fixed shapes, so batched requests get
+                # a cache allocated once and are padded to max_batch_size on every
+                # call. Eager batches only pay for their real rows, with a dynamic cache
+                self.batch_cache = StaticCache(
+                    config=self.model.config,
+                    max_batch_size=self.config.max_batch_size,
+                    max_cache_len=self.config.max_length,
+                    device=self.config.device,
+                    dtype=self.model.dtype
+                )
             
-            # Move model to device
-            self.model.to(self.config.device)
+            self._warm_up()
             
             logger.info("Model loaded successfully!")
             return True
@@ -74,87 +336,333 @@ class Chatbot:
             logger.error(f"Failed to load model: {str(e)}")
             return False
     
+    def _onnx_path(self) -> str:
+        """Directory holding the ONNX export of the configured model."""
+        return os.path.join(self.config.onnx_dir, self.config.model_name.replace("/", "--"))
+    
+    def export_onnx(self) -> str:
+        """Export the model to ONNX with past_key_values inputs and return its directory."""
+        from optimum.exporters.onnx import main_export
+        
+        output = self._onnx_path()
+        logger.info(f"Exporting {self.config.model_name} to ONNX at {output}")
+        main_export(self.config.model_name, output=output, task="text-generation-with-past")
+        return output
+    
+    def _load_onnx_model(self) -> bool:
+        """Load the ONNX Runtime model, exporting it first if needed."""
+        if importlib.util.find_spec("optimum") is None:
+            logger.error("The onnx backend requires optimum: pip install optimum[onnxruntime]")
+            return False
+        
+        from optimum.onnxruntime import ORTModelForCausalLM
+        
+        onnx_path = self._onnx_path()
+        if not os.path.isdir(onnx_path):
+            self.export_onnx()
+        
+        provider = "CUDAExecutionProvider" if self.config.device == "cuda" else "CPUExecutionProvider"
+        logger.info(f"Loading ONNX Runtime model from {onnx_path} ({provider})")
+        self.model = ORTModelForCausalLM.from_pretrained(
+            onnx_path,
+            use_io_binding=True,
+            provider=provider
+        )
+        return True
+    
+    def _build_quantization_config(self) -> Optional[BitsAndBytesConfig]:
+        """Return the bitsandbytes config for the configured quantization, if usable."""
+        import torch
+        from transformers import BitsAndBytesConfig
+        
+        quantization = self.config.quantization
+        if not quantization or self.config.device != "cuda":
+            return None
+        
+        # transformers' bitsandbytes quantizers and device_map="auto" need both
+        missing = [
+            package for package in ("bitsandbytes", "accelerate")
+            if importlib.util.find_spec(package) is None
+        ]
+        if missing:
+            logger.warning(f"{', '.join(missing)} not installed; loading unquantized weights")
+            return None
+        
+        if quantization == "int8":
+            # A zero outlier threshold keeps every matmul on the int8 path
+            return BitsAndBytesConfig(load_in_8bit=True, llm_int8_threshold=0.0)
+        if quantization == "int4":
+            return BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_compute_dtype=torch.float16
+            )
+        
+        logger.warning(f"Unknown quantization '{quantization}'; loading unquantized weights")
+        return None
+    
+    @staticmethod
+    def _cpu_supports_bf16() -> bool:
+        """Whether the CPU has native bfloat16 matmul (AVX512-BF16 or AMX)."""
+        import torch
+        checks = ("_is_avx512_bf16_supported", "_is_amx_tile_supported")
+        return any(getattr(torch.cpu, check, lambda: False)() for check in checks)
+    
+    @staticmethod
+    def _clear_static_cache(cache: StaticCache) -> None:
+        """
+        Zero a StaticCache in place under inference mode.
+        
+        Its buffers are allocated inside generate(), so they are inference tensors
+        and may only be updated in place with inference mode enabled.
+        """
+        import torch
+        with torch.inference_mode():
+            cache.reset()
+    
+    def _generation_context(self) -> contextlib.AbstractContextManager:
+        """
+        Context for generate() calls: inference mode, plus fused attention kernels
+        on CUDA or bfloat16 autocast on CPU.
+        """
+        import torch
+        from torch.nn.attention import SDPBackend, sdpa_kernel
+        
+        stack = contextlib.ExitStack()
+        stack.enter_context(torch.inference_mode())
+        if self.config.device == "cuda":
+            stack.enter_context(sdpa_kernel(
+                [SDPBackend.FLASH_ATTENTION, SDPBackend.EFFICIENT_ATTENTION]
+            ))
+        elif self.cpu_autocast:
+            stack.enter_context(torch.autocast(device_type="cpu", dtype=torch.bfloat16))
+        return stack
+    
+    def _warm_up(self) -> None:
+        """
+        Run throwaway generations over the shapes that are actually served, so
+        kernel selection and decode-step compilation happen before the first turn:
+        a realistic single-conversation prompt and, with a batch cache, a full batch.
+        
+        Compiled CUDA graphs are recorded per thread, so this must run on the
+        thread that later serves requests.
+        """
+        import torch
+        
+        if self.config.device == "cuda":
+            # Let cuDNN autotune its kernels during the warm-up
+            torch.backends.cudnn.benchmark = True
+        
+        start = time.perf_counter()
+        prompt_ids = self._encode_conversation([_WARM_UP_PROMPT])
+        input_ids = torch.tensor([prompt_ids], dtype=torch.long, device=self.config.device)
+        with self._generation_context():
+            self.model.generate(
+                input_ids,
+                generation_config=self.gen_config,
+                attention_mask=torch.ones_like(input_ids),
+                past_key_values=self.kv_cache,
+                max_new_tokens=_WARM_UP_TOKENS
+            )
+            
+            if self.batch_cache is not None:
+                padded_ids, padded_mask = _left_pad(
+                    [prompt_ids], self.config.max_batch_size, self.eos_id
+                )
+                self.batch_cache.reset()
+                self.model.generate(
+                    torch.tensor(padded_ids, dtype=torch.long, device=self.config.device),
+                    generation_config=self.gen_config,
+                    attention_mask=torch.tensor(padded_mask, dtype=torch.long, device=self.config.device),
+                    past_key_values=self.batch_cache,
+                    max_new_tokens=_WARM_UP_TOKENS
+                )
+                self.batch_cache.reset()
+        
+        self.reset_cache()
+        logger.info(f"Warm-up generation took {time.perf_counter() - start:.2f}s")
+    
+    def reset_cache(self) -> None:
+        """Drop the token history and clear the KV cache without reallocating it."""
+        self.chat_history_ids = None
+        self.cache_length = 0
+        if self.kv_cache is not None:
+            self._clear_static_cache(self.kv_cache)
+    
+    def reset(self) -> None:
+        """Start a new conversation, reusing the allocated KV cache buffers."""
+        self.reset_cache()
+        self.step_count = 0
+    
     def validate_input(self, user_input: str) -> bool:
         """Validate user input."""
         if not user_input or not user_input.strip():
             return False
         return True
     
-    def generate_response(self, user_input: str) -> Tuple[str, bool]:
-        """Generate bot response with error handling."""
+    def generate_response(
+        self,
+        user_input: str,
+        streamer: Optional[BaseStreamer] = None
+    ) -> Tuple[str, bool]:
+        """Generate bot response with error handling, optionally streaming its tokens."""
+        import torch
+        
         try:
             if not self.validate_input(user_input):
                 return "Please provide a valid input.", False
             
-            # Encode user input
-            new_input_ids = self.tokenizer.encode(
-                user_input + self.tokenizer.eos_token, 
-                return_tensors="pt"
-            ).to(self.config.device)
+            # Encode user input; on CUDA it is staged in pinned memory so the
+            # host-to-device copy does not block the stream
+            user_input_ids = self.tokenizer(user_input, return_tensors="pt").input_ids
+            if self.config.device == "cuda":
+                user_input_ids = user_input_ids.pin_memory()
+            user_input_ids = user_input_ids.to(self.config.device, non_blocking=True)
             
-            # Concatenate with chat history if it exists
+            # Terminate the turn with the cached EOS token; a message too long to
+            # leave room for a full reply keeps only its end, as in _encode_conversation
+            new_input_ids = torch.cat([user_input_ids, self.eos_tensor], dim=-1)
+            max_context = self.config.max_length - self.config.max_new_tokens
+            new_input_ids = new_input_ids[:, -max_context:]
+            
+            # Start over if the history plus a full reply would not fit in max_length
+            turn_length = new_input_ids.shape[-1] + self.config.max_new_tokens
+            if self.cache_length + turn_length > self.config.max_length:
+                logger.info("Resetting conversation history to stay within max_length")
+                self.reset_cache()
+            
+            # Concatenate with chat history if it exists; tokens already held in
+            # the KV cache are not recomputed, only the new ones are prefilled
             if self.chat_history_ids is not None:
                 bot_input_ids = torch.cat([self.chat_history_ids, new_input_ids], dim=-1)
             else:
                 bot_input_ids = new_input_ids
             
             # Generate response
-            with torch.no_grad():
-                self.chat_history_ids = self.model.generate(
+            with self._generation_context():
+                output = self.model.generate(
                     bot_input_ids,
-                    max_length=self.config.max_length,
-                    pad_token_id=self.tokenizer.eos_token_id,
-                    do_sample=True,
-                    temperature=self.config.temperature,
-                    top_p=self.config.top_p,
-                    num_return_sequences=1,
-                    early_stopping=True
+                    generation_config=self.gen_config,
+                    attention_mask=torch.ones_like(bot_input_ids),
+                    past_key_values=self.kv_cache,
+                    streamer=streamer
                 )
             
-            # Decode response
-            bot_response = self.tokenizer.decode(
-                self.chat_history_ids[:, bot_input_ids.shape[-1]:][0], 
-                skip_special_tokens=True
-            ).strip()
+            self.chat_history_ids = output.sequences
+            self.cache_length = output.sequences.shape[-1]
+            
+            # Decode only the newly generated tokens
+            new_tokens = output.sequences[0, bot_input_ids.shape[-1]:]
+            bot_response = self.tokenizer.decode(new_tokens, skip_special_tokens=True).strip()
             
             self.step_count += 1
             
             # Reset conversation if needed
             if self.step_count >= self.config.max_conversation_steps:
                 logger.info("Resetting conversation history to prevent memory overflow")
-                self.chat_history_ids = None
-                self.step_count = 0
+                self.reset()
             
             return bot_response, True
             
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
+            # The KV cache may hold part of the failed turn, out of step with the history
+            self.reset_cache()
             return "Sorry, I encountered an error. Please try again.", False
     
+    def _encode_conversation(self, turns: List[str]) -> List[int]:
+        """Encode conversation turns, each ended by EOS, keeping room for a full reply."""
+        max_context = self.config.max_length - self.config.max_new_tokens
+        ids = []
+        for turn in turns:
+            ids.extend(self.tokenizer.encode(turn))
+            ids.append(self.eos_id)
+        return ids[-max_context:]
+    
+    def generate_batch(
+        self,
+        conversations: List[List[str]],
+        on_text: Optional[Callable[[int, str], None]] = None
+    ) -> List[Tuple[str, bool]]:
+        """
+        Generate one reply per conversation with a single batched generate() call.
+        
+        Each conversation is a list of turn texts ending with the new user message.
+        The persistent KV cache is single-conversation, so batched requests rebuild
+        their context from the given turns instead. If given, on_text is called
+        with (row, reply so far) as tokens are generated.
+        """
+        import torch
+        
+        try:
+            if len(conversations) > self.config.max_batch_size:
+                raise ValueError(
+                    f"Got {len(conversations)} conversations, "
+                    f"max_batch_size is {self.config.max_batch_size}"
+                )
+            
+            rows = [self._encode_conversation(turns) for turns in conversations]
+            
+            # Left-pad so every row ends where generation starts; with the
+            # preallocated cache the batch is also filled up to its fixed size
+            batch_size = self.config.max_batch_size if self.batch_cache is not None else len(rows)
+            padded_ids, padded_mask = _left_pad(rows, batch_size, self.eos_id)
+            input_ids = torch.tensor(padded_ids, dtype=torch.long, device=self.config.device)
+            attention_mask = torch.tensor(padded_mask, dtype=torch.long, device=self.config.device)
+            
+            # Without a preallocated cache (ONNX backend, eager decoding, or
+            # max_batch_size 1) generate() falls back to a dynamic cache
+            if self.batch_cache is not None:
+                self._clear_static_cache(self.batch_cache)
+            
+            streamer = BatchStreamer(self.tokenizer, on_text, len(rows)) if on_text else None
+            with self._generation_context():
+                output = self.model.generate(
+                    input_ids,
+                    generation_config=self.gen_config,
+                    attention_mask=attention_mask,
+                    past_key_values=self.batch_cache,
+                    streamer=streamer
+                )
+            
+            replies = self.tokenizer.batch_decode(
+                output.sequences[:len(rows), input_ids.shape[-1]:],
+                skip_special_tokens=True
+            )
+            return [(reply.strip(), True) for reply in replies]
+            
+        except Exception as e:
+            logger.error(f"Error generating batched responses: {str(e)}")
+            return [("Sorry, I encountered an error. Please try again.", False)] * len(conversations)
+    
     def run(self) -> None:
         """Main conversation loop."""
         if not self.load_model():
             logger.error("Failed to load model. Exiting.")
             return
         
+        from transformers import TextStreamer
+        
         print("🤖 AI Chatbot is ready! Type 'quit', 'exit', or 'bye' to end the conversation.")
         print("=" * 60)
         
         while True:
             try:
                 # Get user input
-                user_input = input("👤 You: ").strip()
+                user_input = input(_USER_PROMPT).strip()
                 
                 # Check for exit conditions
-                if user_input.lower() in ['quit', 'exit', 'bye', 'q']:
+                if user_input.lower() in _EXIT_WORDS:
                     print("👋 Goodbye! Thanks for chatting!")
                     break
                 
-                # Generate and display response
-                response, success = self.generate_response(user_input)
-                print(f"🤖 Bot: {response}")
+                # Generate response, printing tokens as they arrive
+                print("🤖 Bot: ", end="", flush=True)
+                streamer = TextStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+                response, success = self.generate_response(user_input, streamer)
                 
                 if not success:
+                    print(response)
                     print("⚠️  There was an issue with the response generation.")
                 
             except KeyboardInterrupt:
@@ -167,6 +675,7 @@ class Chatbot:
 
 def main():
     """Main entry point for the chatbot application."""
+    log_listener = start_logging()
     try:
         config = ChatbotConfig()
         chatbot = Chatbot(config)
@@ -174,6 +683,8 @@ def main():
     except Exception as e:
         logger.error(f"Fatal error: {str(e)}")
         sys.exit(1)
+    finally:
+        stop_logging(log_listener)
 
 
 if __name__ == "__main__":
@@ -6,8 +6,54 @@ This script performs basic functionality tests without requiring model download.
 
 import sys
 import os
+from types import SimpleNamespace
 from typing import List, Tuple
 
+class FakeTokenizer:
+    """Word-level stand-in for a Hugging Face tokenizer; id 0 is EOS."""
+    
+    eos_token_id = 0
+    
+    def __init__(self):
+        self.vocab = {}
+        self.words = {0: "<eos>"}
+    
+    def encode(self, text: str) -> List[int]:
+        ids = []
+        for word in text.split():
+            if word not in self.vocab:
+                self.vocab[word] = len(self.vocab) + 1
+                self.words[self.vocab[word]] = word
+            ids.append(self.vocab[word])
+        return ids
+    
+    def __call__(self, text: str, return_tensors: str = "pt") -> SimpleNamespace:
+        import torch
+        return SimpleNamespace(input_ids=torch.tensor([self.encode(text)]))
+    
+    def decode(self, ids: List[int], skip_special_tokens: bool = False) -> str:
+        if hasattr(ids, "tolist"):
+            ids = ids.tolist()
+        return " ".join(
+            self.words[i] for i in ids
+            if not (skip_special_tokens and i == self.eos_token_id)
+        )
+
+class FakeTensor:
+    """Minimal tensor stand-in exposing the reshape()/tolist() calls streamers use."""
+    
+    def __init__(self, data: list):
+        self.data = data
+    
+    def reshape(self, *shape: int) -> "FakeTensor":
+        flat = []
+        for item in self.data:
+            flat.extend(item if isinstance(item, list) else [item])
+        return FakeTensor(flat)
+    
+    def tolist(self) -> list:
+        return self.data
+
 def test_imports() -> bool:
     """Test if all required modules can be imported."""
     try:
@@ -70,6 +116,264 @@ def test_input_validation() -> bool:
         print(f"❌ Input validation error: {e}")
         return False
 
+def test_left_padding() -> bool:
+    """Test left padding and batch filling for batched generation."""
+    try:
+        from bot import _left_pad
+        input_ids, attention_mask = _left_pad([[1, 2, 3], [4]], 3, 0)
+        
+        # Rows end at the same position; padding goes on the left
+        assert input_ids[:2] == [[1, 2, 3], [0, 0, 4]]
+        assert attention_mask[:2] == [[1, 1, 1], [0, 0, 1]]
+        # Filler rows attend to a single pad token
+        assert input_ids[2] == [0, 0, 0]
+        assert attention_mask[2] == [0, 0, 1]
+        
+        print("✅ Left padding tests passed")
+        return True
+    except Exception as e:
+        print(f"❌ Left padding error: {e}")
+        return False
+
+def test_conversation_encoding() -> bool:
+    """Test conversation encoding and truncation to the context budget."""
+    try:
+        from bot import ChatbotConfig, Chatbot
+        config = ChatbotConfig()
+        config.max_length = 6
+        config.max_new_tokens = 2
+        chatbot = Chatbot(config)
+        chatbot.tokenizer = FakeTokenizer()
+        chatbot.eos_id = FakeTokenizer.eos_token_id
+        
+        # Each turn ends with EOS
+        assert chatbot._encode_conversation(["hi there"]) == [1, 2, 0]
+        # Only the most recent max_length - max_new_tokens tokens are kept
+        ids = chatbot._encode_conversation(["hi there", "yo", "how are"])
+        assert ids == [0, 4, 5, 0]
+        
+        print("✅ Conversation encoding tests passed")
+        return True
+    except Exception as e:
+        print(f"❌ Conversation encoding error: {e}")
+        return False
+
+def test_history_truncation() -> bool:
+    """Test that web requests only carry the recent session history."""
+    try:
+        import web_bot
+    except ImportError as e:
+        print(f"❌ Import error: {e}")
+        return False
+    
+    from bot import ChatbotConfig, Chatbot
+    try:
+        config = ChatbotConfig()
+        config.max_conversation_steps = 2
+        web_bot.chatbot_instance = Chatbot(config)
+        history = [
+            {"role": "user", "content": "one"},
+            {"role": "assistant", "content": "two"},
+            {"role": "user", "content": "three"},
+            {"role": "assistant", "content": "four"},
+            {"role": "user", "content": "five"},
+            {"role": "assistant", "content": "six"},
+        ]
+        
+        # Keep the last max_conversation_steps exchanges plus the new message
+        turns = web_bot._history_to_turns("seven", history)
+        assert turns == ["three", "four", "five", "six", "seven"]
+        
+        # Failed exchanges are skipped entirely, so older ones stay in the window
+        history.insert(4, {"role": "user", "content": "oops"})
+        history.insert(5, {"role": "assistant", "content": "❌ Sorry, I encountered an error."})
+        turns = web_bot._history_to_turns("seven", history)
+        assert turns == ["three", "four", "five", "six", "seven"]
+        
+        print("✅ History truncation tests passed")
+        return True
+    except Exception as e:
+        print(f"❌ History truncation error: {e}")
+        return False
+    finally:
+        web_bot.chatbot_instance = None
+
+def test_conversation_reset() -> bool:
+    """Test that resets clear conversation state and reuse the KV cache."""
+    try:
+        from bot import ChatbotConfig, Chatbot
+        
+        class FakeCache:
+            resets = 0
+            def reset(self):
+                self.resets += 1
+        
+        chatbot = Chatbot(ChatbotConfig())
+        chatbot.kv_cache = FakeCache()
+        chatbot.chat_history_ids = [[1, 2, 3]]
+        chatbot.cache_length = 3
+        chatbot.step_count = 2
+        
+        # reset_cache() clears the history and cache but not the step count
+        chatbot.reset_cache()
+        assert chatbot.chat_history_ids is None
+        assert chatbot.cache_length == 0
+        assert chatbot.kv_cache.resets == 1
+        assert chatbot.step_count == 2
+        
+        # reset() also starts the step count over, keeping the same cache object
+        cache = chatbot.kv_cache
+        chatbot.reset()
+        assert chatbot.step_count == 0
+        assert chatbot.kv_cache is cache
+        assert cache.resets == 2
+        
+        print("✅ Conversation reset tests passed")
+        return True
+    except Exception as e:
+        print(f"❌ Conversation reset error: {e}")
+        return False
+
+def test_device_selection() -> bool:
+    """Test the lazy device probe and the AI_CHAT_DEVICE override."""
+    saved = os.environ.get("AI_CHAT_DEVICE")
+    try:
+        from bot import ChatbotConfig
+        os.environ["AI_CHAT_DEVICE"] = "cpu"
+        config = ChatbotConfig()
+        
+        # Nothing is probed when the config is created
+        assert "device" not in vars(config)
+        # The override is used and cached on first access
+        assert config.device == "cpu"
+        assert vars(config)["device"] == "cpu"
+        
+        print("✅ Device selection tests passed")
+        return True
+    except Exception as e:
+        print(f"❌ Device selection error: {e}")
+        return False
+    finally:
+        if saved is None:
+            os.environ.pop("AI_CHAT_DEVICE", None)
+        else:
+            os.environ["AI_CHAT_DEVICE"] = saved
+
+def test_batch_streamer() -> bool:
+    """Test per-row streaming of batched generation."""
+    try:
+        from bot import BatchStreamer
+        tokenizer = FakeTokenizer()
+        hello, there, friend = tokenizer.encode("hello there friend")
+        eos = FakeTokenizer.eos_token_id
+        reports = []
+        streamer = BatchStreamer(tokenizer, lambda row, text: reports.append((row, text)), 2)
+        
+        # The first put() is the prompt and is not reported
+        streamer.put(FakeTensor([[friend, friend], [friend, friend], [eos, eos]]))
+        assert reports == []
+        
+        # Each row accumulates its own tokens; the third row is batch padding
+        streamer.put(FakeTensor([hello, there, friend]))
+        streamer.put(FakeTensor([[there], [eos], [friend]]))
+        streamer.end()
+        assert reports == [(0, "hello"), (1, "there"), (0, "hello there")]
+        
+        print("✅ Batch streamer tests passed")
+        return True
+    except Exception as e:
+        print(f"❌ Batch streamer error: {e}")
+        return False
+
+def test_generate_response() -> bool:
+    """Test history, cache bookkeeping and resets of generate_response() with a fake model."""
+    try:
+        import torch
+        from bot import ChatbotConfig, Chatbot
+        
+        class FakeCache:
+            resets = 0
+            def reset(self):
+                self.resets += 1
+        
+        class FakeModel:
+            """Replies "fine thanks" to every prompt and records what it was given."""
+            def __init__(self, tokenizer):
+                self.reply = torch.tensor([tokenizer.encode("fine thanks") + [tokenizer.eos_token_id]])
+                self.prompts = []
+                self.error = None
+            
+            def generate(self, input_ids, **kwargs):
+                self.prompts.append(input_ids[0].tolist())
+                if self.error is not None:
+                    raise self.error
+                return SimpleNamespace(sequences=torch.cat([input_ids, self.reply], dim=-1))
+        
+        config = ChatbotConfig()
+        config.device = "cpu"
+        config.max_length = 20
+        config.max_new_tokens = 4
+        config.max_conversation_steps = 4
+        chatbot = Chatbot(config)
+        chatbot.tokenizer = FakeTokenizer()
+        chatbot.model = FakeModel(chatbot.tokenizer)
+        chatbot.kv_cache = FakeCache()
+        chatbot.eos_id = FakeTokenizer.eos_token_id
+        chatbot.eos_tensor = torch.tensor([[chatbot.eos_id]])
+        hi, there, fine, thanks, how, are, you = chatbot.tokenizer.encode(
+            "hi there fine thanks how are you"
+        )
+        
+        # The first turn is ended by EOS; only the new tokens are decoded
+        assert chatbot.generate_response("hi there") == ("fine thanks", True)
+        assert chatbot.model.prompts[-1] == [hi, there, 0]
+        assert chatbot.cache_length == 6
+        assert chatbot.step_count == 1
+        
+        # Later turns extend the history held in the KV cache
+        assert chatbot.generate_response("how are you") == ("fine thanks", True)
+        assert chatbot.model.prompts[-1] == [hi, there, 0, fine, thanks, 0, how, are, you, 0]
+        assert chatbot.chat_history_ids[0].tolist() == chatbot.model.prompts[-1] + [fine, thanks, 0]
+        assert chatbot.cache_length == 13
+        assert chatbot.step_count == 2
+        
+        # 13 cached + 4 input + 4 reply tokens overflow max_length: start over
+        assert chatbot.generate_response("hi how are") == ("fine thanks", True)
+        assert chatbot.model.prompts[-1] == [hi, how, are, 0]
+        assert chatbot.kv_cache.resets == 1
+        assert chatbot.cache_length == 7
+        assert chatbot.step_count == 3
+        
+        # Reaching max_conversation_steps resets the whole conversation
+        assert chatbot.generate_response("you") == ("fine thanks", True)
+        assert chatbot.chat_history_ids is None
+        assert chatbot.cache_length == 0
+        assert chatbot.step_count == 0
+        assert chatbot.kv_cache.resets == 2
+        
+        # A failed turn clears the possibly half-written cache
+        chatbot.generate_response("hi there")
+        chatbot.model.error = RuntimeError("boom")
+        response, success = chatbot.generate_response("how are you")
+        assert not success and response.startswith("Sorry")
+        assert chatbot.chat_history_ids is None
+        assert chatbot.cache_length == 0
+        assert chatbot.step_count == 1
+        assert chatbot.kv_cache.resets == 3
+        
+        # A single message longer than the context budget keeps only its end
+        chatbot.model.error = None
+        words = [f"w{i}" for i in range(20)]
+        chatbot.generate_response(" ".join(words))
+        assert chatbot.model.prompts[-1] == chatbot.tokenizer.encode(" ".join(words[5:])) + [0]
+        assert chatbot.cache_length == 19
+        
+        print("✅ Generate response tests passed")
+        return True
+    except Exception as e:
+        print(f"❌ Generate response error: {e}")
+        return False
+
 def test_syntax() -> bool:
     """Test Python syntax compilation."""
     try:
@@ -89,6 +393,13 @@ def run_tests() -> Tuple[bool, List[str]]:
         ("Config Creation", test_config_creation),
         ("Chatbot Instantiation", test_chatbot_instantiation),
         ("Input Validation", test_input_validation),
+        ("Left Padding", test_left_padding),
+        ("Conversation Encoding", test_conversation_encoding),
+        ("History Truncation", test_history_truncation),
+        ("Conversation Reset", test_conversation_reset),
+        ("Device Selection", test_device_selection),
+        ("Batch Streamer", test_batch_streamer),
+        ("Generate Response", test_generate_response),
     ]
     
     results = []
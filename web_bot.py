@@ -3,82 +3,173 @@ AI Chat Offline - Web Interface
 A Gradio-based web interface for the AI chatbot.
 """
 
+import asyncio
 import gradio as gr
 import logging
-from typing import List, Tuple
-from bot import ChatbotConfig, Chatbot
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple
+from bot import ChatbotConfig, Chatbot, start_logging, stop_logging
 
-# Configure logging for web interface
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by bot; main() moves it onto a background thread
 logger = logging.getLogger(__name__)
 
+# Space theme stylesheet, read once at import
+_CSS = Path(__file__).with_name("space.css").read_text(encoding="utf-8")
+
 # Global chatbot instance
 chatbot_instance = None
 
+# Micro-batching of concurrent chat requests
+MAX_BATCH_SIZE = 8
+BATCH_WINDOW_SECONDS = 0.01
+_request_queue: Optional[asyncio.Queue] = None
+_batch_worker: Optional[asyncio.Task] = None
+
+# All model work runs on this one thread: compiled CUDA graphs are recorded per
+# thread, so the warm-up in load_model must run where requests are served
+_generation_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="generation")
+
+# Marks error replies in the chat history; they are never sent back to the model
+_ERROR_PREFIX = "❌"
+
 def initialize_chatbot() -> bool:
-    """Initialize the chatbot instance."""
+    """Initialize the chatbot instance. Called once from main() before launch."""
     global chatbot_instance
     try:
         if chatbot_instance is None:
             config = ChatbotConfig()
+            config.max_batch_size = MAX_BATCH_SIZE
             chatbot_instance = Chatbot(config)
-            if not chatbot_instance.load_model():
+            if not _generation_executor.submit(chatbot_instance.load_model).result():
                 return False
         return True
     except Exception as e:
         logger.error(f"Failed to initialize chatbot: {e}")
         return False
 
-def chat_with_bot(message: str, history: List[dict]) -> Tuple[str, List[dict]]:
+async def _run_batches(queue: asyncio.Queue) -> None:
+    """Group queued requests arriving within the batch window into one generate() call."""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + BATCH_WINDOW_SECONDS
+        while len(batch) < MAX_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        conversations = [turns for turns, _ in batch]
+        
+        def on_text(row: int, text: str) -> None:
+            # Called from the generation thread; hand partial text to the event loop
+            loop.call_soon_threadsafe(batch[row][1].put_nowait, text)
+        
+        try:
+            # Run the model off the event loop so new requests keep queueing
+            results = await loop.run_in_executor(
+                _generation_executor, chatbot_instance.generate_batch, conversations, on_text
+            )
+        except Exception as e:
+            logger.error(f"Error in batch worker: {e}")
+            results = [("", False)] * len(batch)
+        
+        for (_, updates), result in zip(batch, results):
+            updates.put_nowait(result)
+
+def _get_request_queue() -> asyncio.Queue:
+    """Return the request queue, starting the batch worker on first use."""
+    global _request_queue, _batch_worker
+    if _request_queue is None:
+        _request_queue = asyncio.Queue()
+        _batch_worker = asyncio.create_task(_run_batches(_request_queue))
+    return _request_queue
+
+def _history_to_turns(message: str, history: List[dict]) -> List[str]:
+    """
+    Build the conversation turns for a request from the session's chat history.
+    
+    Failed exchanges are left out, and only the last max_conversation_steps
+    exchanges are kept.
+    """
+    turns = []
+    for entry in history:
+        if entry["role"] == "assistant" and entry["content"].startswith(_ERROR_PREFIX):
+            # Drop the user message that got the error reply as well
+            if turns and turns[-1][0] == "user":
+                turns.pop()
+            continue
+        turns.append((entry["role"], entry["content"]))
+    
+    max_messages = 2 * chatbot_instance.config.max_conversation_steps
+    recent = turns[-max_messages:] if max_messages > 0 else []
+    return [content for _, content in recent] + [message]
+
+async def chat_with_bot(
+    message: str,
+    history: List[dict]
+) -> AsyncIterator[Tuple[str, List[dict]]]:
     """
-    Handle chat interaction with the bot.
+    Handle chat interaction with the bot, streaming the reply as it is generated.
+    
+    Concurrent requests are queued and answered together by the batch worker.
+    The conversation context comes from each session's own history.
     
     Args:
         message: User's input message
         history: Chat history as list of message dictionaries
     
-    Returns:
-        Tuple of (empty string, updated history)
+    Yields:
+        Tuples of (empty string, updated history)
     """
     if not message or not message.strip():
-        return "", history
+        yield "", history
+        return
     
-    # Initialize chatbot if not already done
-    if not initialize_chatbot():
-        error_msg = "❌ Failed to initialize chatbot. Please check the logs."
-        history.append({"role": "user", "content": message})
-        history.append({"role": "assistant", "content": error_msg})
-        return "", history
+    # The model is loaded by main() before the server accepts requests
+    assert chatbot_instance is not None
     
+    reply = {"role": "assistant", "content": ""}
     try:
-        # Add user message to history
+        turns = _history_to_turns(message, history)
+        
+        # Add user message and an empty bot reply to fill in as tokens arrive
         history.append({"role": "user", "content": message})
+        history.append(reply)
+        yield "", history
         
-        # Generate bot response
-        response, success = chatbot_instance.generate_response(message)
+        # Queue the request; the worker sends partial texts, then the final result
+        updates: asyncio.Queue = asyncio.Queue()
+        await _get_request_queue().put((turns, updates))
+        while True:
+            update = await updates.get()
+            if not isinstance(update, str):
+                response, success = update
+                break
+            reply["content"] = update
+            yield "", history
         
         if success:
-            # Add bot response to history
-            history.append({"role": "assistant", "content": response})
+            reply["content"] = response
         else:
             # Handle generation failure
-            error_msg = "❌ Sorry, I encountered an error generating a response. Please try again."
-            history.append({"role": "assistant", "content": error_msg})
+            reply["content"] = f"{_ERROR_PREFIX} Sorry, I encountered an error generating a response. Please try again."
         
-        return "", history
+        yield "", history
     
     except Exception as e:
         logger.error(f"Error in chat_with_bot: {e}")
-        error_msg = f"❌ An unexpected error occurred: {str(e)}"
-        history.append({"role": "assistant", "content": error_msg})
-        return "", history
+        reply["content"] = f"{_ERROR_PREFIX} An unexpected error occurred: {str(e)}"
+        if not history or history[-1] is not reply:
+            history.append(reply)
+        yield "", history
 
 def clear_chat() -> Tuple[str, List]:
-    """Clear the chat history."""
-    global chatbot_instance
-    if chatbot_instance:
-        chatbot_instance.chat_history_ids = None
-        chatbot_instance.step_count = 0
+    """Clear the chat history. The context lives in the session history, so no model state is reset."""
     return "", []
 
 def get_model_info() -> str:
@@ -89,7 +180,8 @@ def get_model_info() -> str:
 **🤖 AI Core Diagnostics:**
 - **🧠 Neural Network**: {config.model_name}
 - **⚡ Processing Unit**: {config.device.upper()}
-- **📏 Transmission Range**: {config.max_length} characters
+- **📏 Transmission Range**: {config.max_length} tokens
+- **📨 Reply Length**: {config.max_new_tokens} tokens
 - **🌡️ Creativity Level**: {config.temperature}
 - **🎯 Focus Parameter**: {config.top_p}
 - **🔄 Memory Cycles**: {config.max_conversation_steps}
@@ -101,174 +193,7 @@ def get_model_info() -> str:
 def create_interface():
     """Create and configure the Gradio interface."""
     
-    # Modern Space Theme CSS
-    css = """
-    @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700;900&family=Space+Mono:wght@400;700&display=swap');
-    
-    .gradio-container {
-        max-width: 1200px !important;
-        margin: auto !important;
-        background: linear-gradient(135deg, #0c0c0c 0%, #1a1a2e 50%, #16213e 100%) !important;
-        min-height: 100vh !important;
-        font-family: 'Space Mono', monospace !important;
-    }
-    
-    /* Header Styling */
-    .gradio-container h1 {
-        background: linear-gradient(45deg, #00d4ff, #ff00ff, #00ff88) !important;
-        -webkit-background-clip: text !important;
-        -webkit-text-fill-color: transparent !important;
-        background-clip: text !important;
-        font-family: 'Orbitron', monospace !important;
-        font-weight: 900 !important;
-        text-align: center !important;
-        margin-bottom: 20px !important;
-        text-shadow: 0 0 30px rgba(0, 212, 255, 0.5) !important;
-    }
-    
-    /* Chat Interface */
-    .chatbot {
-        background: rgba(0, 0, 0, 0.3) !important;
-        border: 2px solid rgba(0, 212, 255, 0.3) !important;
-        border-radius: 20px !important;
-        backdrop-filter: blur(10px) !important;
-        box-shadow: 0 8px 32px rgba(0, 212, 255, 0.1) !important;
-    }
-    
-    /* Message Bubbles */
-    .message {
-        margin: 10px 0 !important;
-        padding: 15px 20px !important;
-        border-radius: 20px !important;
-        max-width: 80% !important;
-        word-wrap: break-word !important;
-        position: relative !important;
-    }
-    
-    .message.user {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-        color: white !important;
-        margin-left: auto !important;
-        margin-right: 0 !important;
-        box-shadow: 0 4px 15px rgba(102, 126, 234, 0.3) !important;
-    }
-    
-    .message.assistant {
-        background: linear-gradient(135deg, #00d4ff 0%, #0099cc 100%) !important;
-        color: white !important;
-        margin-left: 0 !important;
-        margin-right: auto !important;
-        box-shadow: 0 4px 15px rgba(0, 212, 255, 0.3) !important;
-    }
-    
-    /* Input Area */
-    .textbox {
-        background: rgba(0, 0, 0, 0.5) !important;
-        border: 2px solid rgba(0, 212, 255, 0.3) !important;
-        border-radius: 15px !important;
-        color: white !important;
-        backdrop-filter: blur(10px) !important;
-    }
-    
-    .textbox:focus {
-        border-color: #00d4ff !important;
-        box-shadow: 0 0 20px rgba(0, 212, 255, 0.5) !important;
-    }
-    
-    /* Buttons */
-    .btn {
-        background: linear-gradient(45deg, #00d4ff, #ff00ff) !important;
-        border: none !important;
-        border-radius: 25px !important;
-        color: white !important;
-        font-weight: bold !important;
-        padding: 12px 24px !important;
-        transition: all 0.3s ease !important;
-        box-shadow: 0 4px 15px rgba(0, 212, 255, 0.3) !important;
-    }
-    
-    .btn:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: 0 6px 20px rgba(0, 212, 255, 0.5) !important;
-    }
-    
-    .btn.secondary {
-        background: linear-gradient(45deg, #667eea, #764ba2) !important;
-        box-shadow: 0 4px 15px rgba(102, 126, 234, 0.3) !important;
-    }
-    
-    /* Panels */
-    .panel {
-        background: rgba(0, 0, 0, 0.4) !important;
-        border: 1px solid rgba(0, 212, 255, 0.2) !important;
-        border-radius: 15px !important;
-        padding: 20px !important;
-        backdrop-filter: blur(10px) !important;
-        margin: 10px 0 !important;
-    }
-    
-    /* Status Indicator */
-    .status {
-        background: rgba(0, 255, 136, 0.1) !important;
-        border: 1px solid rgba(0, 255, 136, 0.3) !important;
-        border-radius: 10px !important;
-        padding: 10px !important;
-        color: #00ff88 !important;
-        font-weight: bold !important;
-    }
-    
-    /* Scrollbar */
-    ::-webkit-scrollbar {
-        width: 8px !important;
-    }
-    
-    ::-webkit-scrollbar-track {
-        background: rgba(0, 0, 0, 0.3) !important;
-        border-radius: 10px !important;
-    }
-    
-    ::-webkit-scrollbar-thumb {
-        background: linear-gradient(45deg, #00d4ff, #ff00ff) !important;
-        border-radius: 10px !important;
-    }
-    
-    ::-webkit-scrollbar-thumb:hover {
-        background: linear-gradient(45deg, #ff00ff, #00d4ff) !important;
-    }
-    
-    /* Animations */
-    @keyframes float {
-        0%, 100% { transform: translateY(0px); }
-        50% { transform: translateY(-10px); }
-    }
-    
-    @keyframes glow {
-        0%, 100% { box-shadow: 0 0 20px rgba(0, 212, 255, 0.3); }
-        50% { box-shadow: 0 0 30px rgba(0, 212, 255, 0.6); }
-    }
-    
-    .floating {
-        animation: float 3s ease-in-out infinite !important;
-    }
-    
-    .glowing {
-        animation: glow 2s ease-in-out infinite !important;
-    }
-    
-    /* Responsive Design */
-    @media (max-width: 768px) {
-        .gradio-container {
-            padding: 10px !important;
-        }
-        
-        .message {
-            max-width: 95% !important;
-            padding: 12px 16px !important;
-        }
-    }
-    """
-    
-    with gr.Blocks(css=css, title="AI Chat Offline", theme=gr.themes.Soft()) as interface:
+    with gr.Blocks(css=_CSS, title="AI Chat Offline", theme=gr.themes.Soft()) as interface:
         
         # Header with Space Theme
         gr.Markdown("""
@@ -340,14 +265,15 @@ def create_interface():
                 
                 ### ⚠️ Space Station Notes
                 - AI Core downloads only on first use
-                - Communication history resets after 10 exchanges
+                - AI Core remembers the last 10 exchanges of each session
                 - Check terminal for detailed mission logs
                 - Quantum entanglement requires stable connection
                 """)
         
         # Event handlers
-        def send_message(message, history):
-            return chat_with_bot(message, history)
+        async def send_message(message, history):
+            async for update in chat_with_bot(message, history):
+                yield update
         
         def update_status():
             if chatbot_instance and chatbot_instance.model:
@@ -356,8 +282,14 @@ def create_interface():
                 return "🟡 **Space Station Status**: Initializing AI Core..."
         
         # Connect events
-        msg_input.submit(send_message, [msg_input, chatbot], [msg_input, chatbot])
-        send_btn.click(send_message, [msg_input, chatbot], [msg_input, chatbot])
+        msg_input.submit(
+            send_message, [msg_input, chatbot], [msg_input, chatbot],
+            concurrency_limit=MAX_BATCH_SIZE, concurrency_id="chat"
+        )
+        send_btn.click(
+            send_message, [msg_input, chatbot], [msg_input, chatbot],
+            concurrency_limit=MAX_BATCH_SIZE, concurrency_id="chat"
+        )
         clear_btn.click(clear_chat, outputs=[msg_input, chatbot])
         info_btn.click(get_model_info, outputs=model_info)
         
@@ -368,6 +300,7 @@ def create_interface():
 
 def main():
     """Main function to launch the web interface."""
+    log_listener = start_logging()
     try:
         print("🚀 Launching AI Space Station Web Interface...")
         print("🌌 Opening Space Station Control Panel in your browser")
@@ -375,6 +308,11 @@ def main():
         print("⏳ AI Core initialization may take 1-2 minutes on first launch")
         print("=" * 60)
         
+        # Load the model before accepting requests so no user waits on it
+        if not initialize_chatbot():
+            print("❌ Failed to initialize AI Core. Please check the logs.")
+            return 1
+        
         # Create and launch interface
         interface = create_interface()
         
@@ -392,6 +330,8 @@ def main():
         logger.error(f"Failed to launch web interface: {e}")
         print(f"❌ Error launching web interface: {e}")
         return 1
+    finally:
+        stop_logging(log_listener)
     
     return 0
 